@@ -1,11 +1,33 @@
 # app.py
 import streamlit as st
+import json
+import logging
+import os
 import pickle
+import sqlite3
+import threading
+import time
+import numpy as np
 import pandas as pd
 import requests
-from functools import lru_cache
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from urllib3.util.retry import Retry
+
+try:
+    import redis
+except ImportError:  # optional; only used when a [redis] url is configured
+    redis = None
+
+try:
+    # orjson parses the larger TMDB payloads (details+credits+videos) several times faster
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+logging.basicConfig(level=logging.WARNING)
+log = logging.getLogger(__name__)
 
 # ------------------------------
 # Page Configuration
@@ -34,28 +56,146 @@ if "random_movie" not in st.session_state:
 # Expect a .streamlit/secrets.toml with:
 # [tmdb]
 # api_key = "YOUR_TMDB_API_KEY"
+# and optionally, to share the TMDB cache between app instances:
+# [redis]
+# url = "redis://localhost:6379/0"
 TMDB_API_KEY = st.secrets["tmdb"]["api_key"]
-
-def requests_retry_session(
-    retries=5,
-    backoff_factor=1,
-    status_forcelist=(500, 502, 504),
-    session=None,
+TMDB_CACHE_TTL = 86400  # poster/trailer/details barely change; keep them a day
+REDIS_TIMEOUT = 0.5  # seconds, for both connect and read
+REDIS_RETRY_AFTER = 60  # seconds to skip Redis after a connection error
+# On-disk cache of per-movie TMDB results, shared by every session and worker
+TMDB_CACHE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tmdb_cache.sqlite")
+
+LOG_FAILURE_WINDOW = 300  # seconds between repeat warnings for the same (call, id)
+LOG_FAILURE_MAX_KEYS = 128
+
+@st.cache_resource
+def _failure_log_state():
+    # (call, id) -> when it was last logged, oldest first; shared by the fetch threads
+    return OrderedDict(), threading.Lock()
+
+def _log_failure(what: str, key, error):
+    # Rate-limited so a flaky movie or a TMDB outage doesn't flood the log
+    last_logged, lock = _failure_log_state()
+    now = time.monotonic()
+    with lock:
+        last = last_logged.get((what, key))
+        if last is not None and now - last < LOG_FAILURE_WINDOW:
+            return
+        last_logged[(what, key)] = now
+        last_logged.move_to_end((what, key))
+        while len(last_logged) > LOG_FAILURE_MAX_KEYS:
+            last_logged.popitem(last=False)
+    log.warning("%s error for %s: %s", what, key, error)
+
+# Streamlit re-executes this script on every rerun, so process-wide resources
+# are held in st.cache_resource rather than rebuilt each time.
+@st.cache_resource
+def _build_session(
+    retries=3,
+    backoff_factor=0.3,
+    status_forcelist=(500, 502, 503, 504),
 ):
-    session = session or requests.Session()
+    session = requests.Session()
+    # Fail fast: a short backoff keeps a bad TMDB spell from stalling the page
+    # for half a minute, and only idempotent GETs are ever retried.
     retry = Retry(
         total=retries,
         read=retries,
         connect=retries,
         backoff_factor=backoff_factor,
         status_forcelist=status_forcelist,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    # One pooled adapter for the whole process so TMDB calls reuse connections
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
 
-@lru_cache(maxsize=4096)
+@st.cache_resource
+def _build_pool():
+    # TMDB calls are network-bound, so fan them out over a shared thread pool
+    return ThreadPoolExecutor(max_workers=16)
+
+_SESSION = _build_session()
+_POOL = _build_pool()
+
+def requests_retry_session():
+    # Kept for back-compat; always hands out the shared pooled session.
+    return _SESSION
+
+@st.cache_resource
+def _build_redis_client():
+    url = st.secrets.get("redis", {}).get("url")
+    if redis is None or not url:
+        return None
+    try:
+        # Short timeouts: an unreachable Redis must not stall page renders
+        return redis.Redis.from_url(url, socket_connect_timeout=REDIS_TIMEOUT, socket_timeout=REDIS_TIMEOUT)
+    except Exception as e:
+        _log_failure("redis connect", None, e)
+        return None
+
+_REDIS = _build_redis_client()
+
+@st.cache_resource
+def _redis_state():
+    # After a connection error Redis is skipped until "down_until" (monotonic time)
+    return {"down_until": 0.0}
+
+def _redis_available():
+    return _REDIS is not None and time.monotonic() >= _redis_state()["down_until"]
+
+def _redis_failed(what: str, key, error):
+    if isinstance(error, redis.exceptions.ConnectionError):  # includes timeouts
+        _redis_state()["down_until"] = time.monotonic() + REDIS_RETRY_AFTER
+    _log_failure(what, key, error)
+
+@st.cache_resource
+def _open_tmdb_cache():
+    conn = sqlite3.connect(TMDB_CACHE_DB, check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS tmdb("
+        "imdb TEXT PRIMARY KEY, tmdb_id INT, poster TEXT, trailer TEXT, details_json TEXT, ts INT)"
+    )
+    conn.commit()
+    # The connection is shared by the fetch threads, so all access goes through the lock
+    return conn, threading.Lock()
+
+_DB, _DB_LOCK = _open_tmdb_cache()
+
+def _redis_get(key: str):
+    if not _redis_available():
+        return None
+    try:
+        cached = _REDIS.get(key)
+        return json.loads(cached) if cached else None
+    except Exception as e:
+        _redis_failed("redis get", key, e)
+        return None
+
+def _redis_set(key: str, value):
+    if not _redis_available():
+        return
+    try:
+        _REDIS.set(key, json.dumps(value), ex=TMDB_CACHE_TTL)
+    except Exception as e:
+        _redis_failed("redis set", key, e)
+
+# The st.cache_data fetchers below raise on network errors and non-200 responses,
+# because st.cache_data never stores an exception. A transient TMDB failure is
+# then retried on the next call instead of being remembered for the whole TTL.
+# The uncached wrappers catch and log those errors.
+@st.cache_data(ttl=TMDB_CACHE_TTL, max_entries=20000, show_spinner=False)
+def _fetch_tmdb_id(imdb_id: str):
+    url = f"https://api.themoviedb.org/3/find/{imdb_id}?api_key={TMDB_API_KEY}&external_source=imdb_id"
+    r = _SESSION.get(url, timeout=20)
+    r.raise_for_status()
+    results = _json_loads(r.content).get("movie_results") or []
+    return results[0].get("id") if results else None
+
 def _resolve_tmdb_id_from_imdb(imdb_id: str):
     """
     Resolve a TMDB numeric movie id from an imdb_id like 'tt1375666'.
@@ -64,96 +204,172 @@ def _resolve_tmdb_id_from_imdb(imdb_id: str):
     if not imdb_id:
         return None
     try:
-        url = f"https://api.themoviedb.org/3/find/{imdb_id}?api_key={TMDB_API_KEY}&external_source=imdb_id"
-        r = requests_retry_session().get(url, timeout=20)
-        if r.status_code == 200:
-            payload = r.json()
-            results = payload.get("movie_results") or []
-            if results:
-                return results[0].get("id")
+        return _fetch_tmdb_id(imdb_id)
     except Exception as e:
-        print("resolve_tmdb_id error:", e)
+        _log_failure("resolve_tmdb_id", imdb_id, e)
+        return None
+
+def _trailer_from_videos(videos):
+    for video in videos:
+        if video.get("type") == "Trailer" and video.get("site") == "YouTube":
+            return f"https://youtu.be/{video['key']}"
     return None
 
-def fetch_poster_by_imdb(imdb_id: str):
-    tmdb_id = _resolve_tmdb_id_from_imdb(imdb_id)
+def _fmt_money(amount):
+    return f"${amount:,}" if amount else "N/A"
+
+def _parse_movie_details(data: dict, director_name: str = "N/A"):
+    # Use your dataframe's 'director' value if provided
+    directors = director_name if director_name else "N/A"
+
+    # Cast (top 5 from TMDB credits)
+    cast = data.get("credits", {}).get("cast", [])[:5]
+    cast_details = []
+    for actor in cast:
+        cast_details.append({
+            "name": actor.get("name"),
+            "character": actor.get("character"),
+            "profile": f"https://image.tmdb.org/t/p/w500{actor['profile_path']}" if actor.get("profile_path") else None
+        })
+
+    genres = ", ".join(g["name"] for g in data.get("genres") or []) or "N/A"
+    budget = _fmt_money(data.get("budget"))
+    revenue = _fmt_money(data.get("revenue"))
+    available_in = ", ".join(lang["english_name"] for lang in data.get("spoken_languages") or []) or "N/A"
+    return {
+        "rating": data.get("vote_average"),
+        "vote_count": data.get("vote_count"),
+        "release_date": data.get("release_date"),
+        "runtime": data.get("runtime"),
+        "tagline": data.get("tagline"),
+        "overview": data.get("overview"),
+        "director": directors,
+        "cast": cast_details,
+        "genres": genres,
+        "budget": budget,
+        "revenue": revenue,
+        "available_in": available_in,
+    }
+
+_EMPTY_BUNDLE = {"poster": None, "trailer": None, "details": None}
+
+@st.cache_data(ttl=TMDB_CACHE_TTL, max_entries=20000, show_spinner=False)
+def _fetch_movie_bundle(tmdb_id: int):
+    cache_key = f"tmdb:bundle:{tmdb_id}"
+    cached = _redis_get(cache_key)
+    if cached is not None:
+        return cached
+    url = f"https://api.themoviedb.org/3/movie/{tmdb_id}?api_key={TMDB_API_KEY}&append_to_response=videos,credits"
+    response = _SESSION.get(url, timeout=20)
+    response.raise_for_status()
+    data = _json_loads(response.content)
+    poster_path = data.get("poster_path")
+    bundle = {
+        "poster": f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else None,
+        "trailer": _trailer_from_videos(data.get("videos", {}).get("results", [])),
+        "details": _parse_movie_details(data),
+    }
+    _redis_set(cache_key, bundle)
+    return bundle
+
+def fetch_movie_bundle_by_tmdb(tmdb_id: int, director_name: str = "N/A"):
+    """
+    Poster, trailer and details for one movie from a single TMDB request
+    (append_to_response=videos,credits), cached per TMDB id.
+    Returns {"poster": ..., "trailer": ..., "details": ...}; missing parts are None.
+    """
     if not tmdb_id:
-        return None
+        return dict(_EMPTY_BUNDLE)
     try:
-        url = f"https://api.themoviedb.org/3/movie/{tmdb_id}?api_key={TMDB_API_KEY}"
-        response = requests_retry_session().get(url, timeout=20)
-        if response.status_code == 200:
-            data = response.json()
-            poster_path = data.get("poster_path")
-            if poster_path:
-                return f"https://image.tmdb.org/t/p/w500{poster_path}"
+        bundle = _fetch_movie_bundle(tmdb_id)
     except Exception as e:
-        print("fetch_poster error:", e)
-    return None
+        _log_failure("fetch_movie_bundle", tmdb_id, e)
+        return dict(_EMPTY_BUNDLE)
+    # Director comes from the dataframe, not TMDB, so it's applied after the cache
+    if bundle["details"]:
+        bundle["details"]["director"] = director_name if director_name else "N/A"
+    return bundle
+
+def _cached_bundle_by_imdb(imdb_id: str):
+    # Everything TMDB gave us for one imdb_id, from SQLite or fetched and stored.
+    try:
+        with _DB_LOCK:
+            row = _DB.execute(
+                "SELECT poster, trailer, details_json FROM tmdb WHERE imdb = ? AND ts > ? AND details_json IS NOT NULL",
+                (imdb_id, int(time.time()) - TMDB_CACHE_TTL),
+            ).fetchone()
+        if row:
+            poster, trailer, details_json = row
+            return {"poster": poster, "trailer": trailer, "details": json.loads(details_json) if details_json else None}
+    except Exception as e:
+        _log_failure("tmdb cache read", imdb_id, e)
 
-def fetch_trailer_by_imdb(imdb_id: str):
     tmdb_id = _resolve_tmdb_id_from_imdb(imdb_id)
-    if not tmdb_id:
-        return None
+    bundle = fetch_movie_bundle_by_tmdb(tmdb_id)
+    # A failed lookup comes back without details; leave it out so it's retried
+    if not bundle["details"]:
+        return bundle
     try:
-        url = f"https://api.themoviedb.org/3/movie/{tmdb_id}/videos?api_key={TMDB_API_KEY}"
-        response = requests_retry_session().get(url, timeout=20)
-        if response.status_code == 200:
-            for video in response.json().get("results", []):
-                if video.get("type") == "Trailer" and video.get("site") == "YouTube":
-                    return f"https://youtu.be/{video['key']}"
+        with _DB_LOCK:
+            _DB.execute(
+                "INSERT OR REPLACE INTO tmdb(imdb, tmdb_id, poster, trailer, details_json, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                (imdb_id, tmdb_id, bundle["poster"], bundle["trailer"], json.dumps(bundle["details"]), int(time.time())),
+            )
+            _DB.commit()
     except Exception as e:
-        print("fetch_trailer error:", e)
-    return None
+        _log_failure("tmdb cache write", imdb_id, e)
+    return bundle
+
+# The dataframe only knows imdb_ids, so these resolve through /find first.
+def fetch_movie_bundle_by_imdb(imdb_id: str, director_name: str = "N/A"):
+    bundle = _cached_bundle_by_imdb(imdb_id)
+    # Director comes from the dataframe, not TMDB, so it's applied after the cache
+    if bundle["details"]:
+        bundle["details"]["director"] = director_name if director_name else "N/A"
+    return bundle
+
+def _local_media(imdb_id: str, column: str):
+    # poster_path / youtube_trailer_key, if the dataframe was enriched with them offline
+    if column not in movies.columns:
+        return None
+    i = _imdb_to_idx.get(imdb_id)
+    if i is None:
+        return None
+    value = _column_array(movies, column)[i]
+    return value if isinstance(value, str) and value else None
+
+def _fetch_poster_and_trailer(imdb_id: str):
+    poster_path = _local_media(imdb_id, "poster_path")
+    trailer_key = _local_media(imdb_id, "youtube_trailer_key")
+    poster = f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else None
+    trailer = f"https://youtu.be/{trailer_key}" if trailer_key else None
+    if poster and trailer:
+        return poster, trailer
+    # Whatever the local columns don't cover comes from a single bundle lookup
+    bundle = _cached_bundle_by_imdb(imdb_id)
+    return poster or bundle["poster"], trailer or bundle["trailer"]
+
+# Back-compat single-field helpers; all of them read through the lookups above.
+def fetch_poster_by_imdb(imdb_id: str):
+    return _fetch_poster_and_trailer(imdb_id)[0]
+
+def fetch_trailer_by_imdb(imdb_id: str):
+    return _fetch_poster_and_trailer(imdb_id)[1]
 
 def get_movie_details_by_imdb(imdb_id: str, director_name: str = "N/A"):
     """
     Get details using imdb_id; we resolve to TMDB id then pull details.
     Director is taken from your dataframe column, so pass it in.
     """
-    tmdb_id = _resolve_tmdb_id_from_imdb(imdb_id)
-    if not tmdb_id:
-        return None
-    try:
-        url = f"https://api.themoviedb.org/3/movie/{tmdb_id}?api_key={TMDB_API_KEY}&append_to_response=credits,videos"
-        response = requests_retry_session().get(url, timeout=20)
-        if response.status_code == 200:
-            data = response.json()
-
-            # Use your dataframe's 'director' value if provided
-            directors = director_name if director_name else "N/A"
-
-            # Cast (top 5 from TMDB credits)
-            cast = data.get("credits", {}).get("cast", [])[:5]
-            cast_details = []
-            for actor in cast:
-                cast_details.append({
-                    "name": actor.get("name"),
-                    "character": actor.get("character"),
-                    "profile": f"https://image.tmdb.org/t/p/w500{actor['profile_path']}" if actor.get("profile_path") else None
-                })
-
-            genres = ", ".join([g["name"] for g in data.get("genres", [])]) if data.get("genres") else "N/A"
-            budget = f"${data.get('budget', 0):,}" if data.get("budget", 0) > 0 else "N/A"
-            revenue = f"${data.get('revenue', 0):,}" if data.get("revenue", 0) > 0 else "N/A"
-            available_in = ", ".join([lang["english_name"] for lang in data.get("spoken_languages", [])]) if data.get("spoken_languages") else "N/A"
-            return {
-                "rating": data.get("vote_average"),
-                "vote_count": data.get("vote_count"),
-                "release_date": data.get("release_date"),
-                "runtime": data.get("runtime"),
-                "tagline": data.get("tagline"),
-                "overview": data.get("overview"),
-                "director": directors,
-                "cast": cast_details,
-                "genres": genres,
-                "budget": budget,
-                "revenue": revenue,
-                "available_in": available_in,
-            }
-    except Exception as e:
-        print("get_movie_details error:", e)
-    return None
+    return fetch_movie_bundle_by_imdb(imdb_id, director_name)["details"]
+
+def _batch_resolve_and_poster(imdb_ids: tuple) -> dict:
+    """
+    Posters for several movies fetched in one pooled pass.
+    Returns {imdb_id: poster_url_or_None}. Not cached itself: each id is already
+    cached below, and caching the whole dict would keep a failed None around.
+    """
+    return dict(zip(imdb_ids, _POOL.map(fetch_poster_by_imdb, imdb_ids)))
 
 # ------------------------------
 # Load Data
@@ -165,30 +381,62 @@ movies = None
 similarity = None
 load_errors = []
 
+# movie_list.parquet is movie_list.pkl converted once with
+#   movies.to_parquet("movie_list.parquet", compression="zstd")
+# so only the columns the UI needs are read; the pickle remains a fallback.
+# It may also carry TMDB poster_path / youtube_trailer_key columns, filled in
+# once offline from TMDB; posters and trailers for those rows need no request.
 candidates = [
+    r"C:\Users\Himanshu\Downloads\Sentiment-Analysis-NLP\notebooks_and_related_files\recommendation\pickle\movie_list.parquet",
     r"C:\Users\Himanshu\Downloads\Sentiment-Analysis-NLP\notebooks_and_related_files\recommendation\pickle\movie_list.pkl",
 ]
-
+MOVIE_COLUMNS = ["original_title", "imdb_id", "director", "poster_path", "youtube_trailer_key"]
+
+@st.cache_resource
+def _load_movies(path: str):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq  # only needed for the parquet path
+        available = pq.ParquetFile(path).schema_arrow.names
+        df = pd.read_parquet(path, columns=[c for c in MOVIE_COLUMNS if c in available])
+    else:
+        df = pickle.load(open(path, "rb"))
+    # Normalize types
+    for col in ("original_title", "imdb_id"):
+        if col in df.columns:
+            df[col] = df[col].astype(str)
+    return df
+
+# similarity.npy is the pickled matrix saved once as float16, e.g.
+#   np.save("similarity.npy", pickle.load(open("similarity.pkl", "rb")).astype(np.float16))
+# It is memory-mapped, so only the rows we actually read get paged in.
+# similarity.pkl is still accepted as a fallback.
 sim_candidates = [
+    r"C:\Users\Himanshu\Downloads\Sentiment-Analysis-NLP\notebooks_and_related_files\recommendation\pickle\similarity.npy",
     r"C:\Users\Himanshu\Downloads\Sentiment-Analysis-NLP\notebooks_and_related_files\recommendation\pickle\similarity.pkl",
 ]
 
+@st.cache_resource
+def _load_similarity(path: str):
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    return pickle.load(open(path, "rb"))
+
 for p in candidates:
     try:
-        movies = pickle.load(open(p, "rb"))
+        movies = _load_movies(p)
         break
     except Exception as e:
         load_errors.append((p, str(e)))
 
 for p in sim_candidates:
     try:
-        similarity = pickle.load(open(p, "rb"))
+        similarity = _load_similarity(p)
         break
     except Exception as e:
         load_errors.append((p, str(e)))
 
 if movies is None or similarity is None:
-    st.error("Could not load movie_list.pkl or similarity.pkl. Check paths/files.")
+    st.error("Could not load movie_list.parquet/movie_list.pkl or similarity.npy/similarity.pkl. Check paths/files.")
     if load_errors:
         with st.expander("Load errors (debug)"):
             for path, err in load_errors:
@@ -208,9 +456,21 @@ if "imdb_id" not in movies.columns:
 # Optional director column; if missing we’ll show N/A
 has_director_col = "director" in movies.columns
 
-# Normalize types
-movies["original_title"] = movies["original_title"].astype(str)
-movies["imdb_id"] = movies["imdb_id"].astype(str)
+@st.cache_resource
+def _build_row_lookups(_movies):
+    # title/imdb_id -> row position, so lookups don't scan the whole dataframe.
+    # Built back to front so duplicates map to their first row, like .iloc[0] did.
+    positions = range(len(_movies) - 1, -1, -1)
+    title_to_idx = dict(zip(_movies["original_title"].values[::-1], positions))
+    imdb_to_idx = dict(zip(_movies["imdb_id"].values[::-1], positions))
+    return title_to_idx, imdb_to_idx
+
+_title_to_idx, _imdb_to_idx = _build_row_lookups(movies)
+
+@st.cache_resource
+def _column_array(_movies, column: str):
+    # Column as a NumPy array, materialized once instead of on every rerun
+    return _movies[column].to_numpy()
 
 # ------------------------------
 # Core Recommender Helpers
@@ -220,28 +480,33 @@ def recommend(movie_title: str):
     movie_title: the value from 'original_title'
     Return list of 5 recommendations with poster & trailer (via imdb_id).
     """
-    index = movies[movies["original_title"] == movie_title].index[0]
-    distances = sorted(list(enumerate(similarity[index])), reverse=True, key=lambda x: x[1])
+    index = _title_to_idx[movie_title]
+    scores = np.asarray(similarity[index])
+
+    # Only the top few are needed: partition instead of sorting the whole row,
+    # then order those by score. Take 6 so we still have 5 after dropping itself.
+    k = min(6, scores.size)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    rec_rows = [movies.iloc[i] for i in top if i != index][:5]
+    media = list(_POOL.map(_fetch_poster_and_trailer, [row.imdb_id for row in rec_rows]))
 
     recommendations = []
-    for i in distances[1:6]:  # skip the first (itself), take next 5
-        row = movies.iloc[i[0]]
-        rec_imdb_id = row.imdb_id
-        poster = fetch_poster_by_imdb(rec_imdb_id)
+    for row, (poster, trailer) in zip(rec_rows, media):
         recommendations.append({
             "title": row.original_title,
             "poster": poster,
-            "trailer": fetch_trailer_by_imdb(rec_imdb_id)
+            "trailer": trailer
         })
     return recommendations
 
 def get_random_movie():
-    random_movie = movies.sample(1).iloc[0]
+    # Poster/trailer/details are fetched by the surprise view itself, in one bundle
+    i = np.random.randint(0, len(movies))
     return {
-        "title": random_movie["original_title"],
-        "poster": fetch_poster_by_imdb(random_movie["imdb_id"]),
-        "trailer": fetch_trailer_by_imdb(random_movie["imdb_id"]),
-        "imdb_id": random_movie["imdb_id"]
+        "title": _column_array(movies, "original_title")[i],
+        "imdb_id": _column_array(movies, "imdb_id")[i],
+        "row": i,
     }
 
 def update_history(imdb_id):
@@ -251,26 +516,29 @@ def update_history(imdb_id):
         if len(st.session_state.history) > 5:
             st.session_state.history.pop(0)
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_trending_movies():
+    # Raises on failure so an outage isn't cached for the hour
+    url = f"https://api.themoviedb.org/3/trending/movie/week?api_key={TMDB_API_KEY}"
+    response = _SESSION.get(url, timeout=20)
+    response.raise_for_status()
+    data = _json_loads(response.content)
+    trending = data.get("results", [])[:5]
+    trending_list = []
+    for movie in trending:
+        trending_list.append({
+            "title": movie.get("title"),
+            "poster": f"https://image.tmdb.org/t/p/w500{movie.get('poster_path')}" if movie.get("poster_path") else None,
+            "tmdb_id": movie.get("id"),
+        })
+    return trending_list
+
 def get_trending_movies():
     # This is independent of your dataset; it's just TMDB's weekly trending.
     try:
-        url = f"https://api.themoviedb.org/3/trending/movie/week?api_key={TMDB_API_KEY}"
-        response = requests_retry_session().get(url, timeout=20)
-        if response.status_code == 200:
-            data = response.json()
-            trending = data.get("results", [])[:5]
-            trending_list = []
-            for movie in trending:
-                trending_list.append({
-                    "title": movie.get("title"),
-                    "poster": f"https://image.tmdb.org/t/p/w500{movie.get('poster_path')}" if movie.get("poster_path") else None,
-                    "tmdb_id": movie.get("id"),
-                })
-            return trending_list
-        else:
-            return []
+        return _fetch_trending_movies()
     except Exception as e:
-        print("get_trending_movies error:", e)
+        _log_failure("get_trending_movies", None, e)
         return []
 
 # ------------------------------
@@ -297,7 +565,8 @@ st.markdown("""
     </h2>
 """, unsafe_allow_html=True)
 
-trending_movies = get_trending_movies()
+with st.spinner("Loading trending movies..."):
+    trending_movies = get_trending_movies()
 trending_cols = st.columns(5)
 for idx, movie in enumerate(trending_movies):
     with trending_cols[idx]:
@@ -318,7 +587,7 @@ col_search, col_spacer, col_surprise = st.columns([3, 1, 2])
 with col_search:
     st.subheader("🔍 Search for a Movie")
     # Use original_title from your DF instead of title
-    selected_movie = st.selectbox("Type to search...", movies["original_title"].values, key="select_movie", help="Start typing to find your movie")
+    selected_movie = st.selectbox("Type to search...", _column_array(movies, "original_title"), key="select_movie", help="Start typing to find your movie")
     if st.button("Show Details & Recommendations", key="show_details"):
         st.session_state.mode = "search"
         st.session_state.selected_movie = selected_movie
@@ -333,91 +602,97 @@ with col_surprise:
 
 st.markdown("<br>", unsafe_allow_html=True)
 
+# ------------------------------
+# Details Rendering (shared by search & surprise)
+# ------------------------------
+def render_details(details, trailer_url, poster):
+    # Display poster and details side-by-side
+    detail_col_left, detail_col_right = st.columns([1, 2])
+    with detail_col_left:
+        if poster:
+            st.image(poster, use_container_width=True)
+    with detail_col_right:
+        if details:
+            # Group 1: Ratings & Runtime
+            st.markdown("#### Ratings & Runtime")
+            info_cols = st.columns([1, 1, 1])
+            with info_cols[0]:
+                rating = details.get('rating', 'N/A')
+                st.markdown(f"**Rating:** <span style='color:green;'>{rating}</span>/10", unsafe_allow_html=True)
+            with info_cols[1]:
+                vote_count = details.get('vote_count', 'N/A')
+                st.markdown(f"**No. of Ratings:** <span style='color:green;'>{vote_count}</span>", unsafe_allow_html=True)
+            with info_cols[2]:
+                runtime = f"{details.get('runtime', 'N/A')} mins" if details.get('runtime') else "N/A"
+                st.markdown(f"**Runtime:** <span style='color:green;'>{runtime}</span>", unsafe_allow_html=True)
+
+            st.markdown("<br>", unsafe_allow_html=True)
+            # Tagline in a blue info box
+            if details.get("tagline"):
+                st.info(details["tagline"])
+            # Overview
+            st.markdown("**Overview:**")
+            st.write(details.get("overview", "N/A"))
+
+            st.markdown("<br>", unsafe_allow_html=True)
+            # Group 2: Release & Financials
+            st.markdown("#### Release & Financials")
+            row1_cols = st.columns([1, 1, 1])
+            with row1_cols[0]:
+                st.markdown(f"**Release Date:** {details.get('release_date', 'N/A')}")
+            with row1_cols[1]:
+                st.markdown(f"**Budget:** {details.get('budget', 'N/A')}")
+            with row1_cols[2]:
+                st.markdown(f"**Revenue:** {details.get('revenue', 'N/A')}")
+                
+            st.markdown("<br>", unsafe_allow_html=True)
+            # Group 3: Production Details
+            st.markdown("#### Production Details")
+            row2_cols = st.columns([1, 1, 1])
+            with row2_cols[0]:
+                st.markdown(f"**Genres:** {details.get('genres', 'N/A')}")
+            with row2_cols[1]:
+                st.markdown(f"**Available in:** {details.get('available_in', 'N/A')}")
+            with row2_cols[2]:
+                st.markdown(f"**Directed by:** {details.get('director', 'N/A')}")
+                
+            st.markdown("<br>", unsafe_allow_html=True)
+            # Cast Section
+            if details.get("cast"):
+                st.markdown("#### Cast")
+                cast_cols = st.columns(len(details["cast"]))
+                for idx, actor in enumerate(details["cast"]):
+                    with cast_cols[idx]:
+                        if actor.get("profile"):
+                            st.image(actor["profile"], use_container_width=True)
+                        st.caption(f"{actor.get('name')} as {actor.get('character')}")
+        else:
+            st.error("Could not retrieve movie details. Please try another movie.")
+
+        if trailer_url:
+            with st.expander("Watch Trailer"):
+                st.video(trailer_url)
+
 # ------------------------------
 # Content Section: Movie Details & Recommendations
 # ------------------------------
 if "mode" in st.session_state and st.session_state.mode:
     if st.session_state.mode == "search":
         movie_title = st.session_state.selected_movie
-        movie_row = movies[movies["original_title"] == movie_title].iloc[0]
+        movie_row = movies.iloc[_title_to_idx[movie_title]]
         imdb_id = movie_row.imdb_id
         director_name = movie_row["director"] if has_director_col and pd.notna(movie_row["director"]) else "N/A"
 
         update_history(imdb_id)
-        details = get_movie_details_by_imdb(imdb_id, director_name=director_name)
-        trailer_url = fetch_trailer_by_imdb(imdb_id)
+        # Poster, details and trailer all come back from one TMDB request
+        bundle = fetch_movie_bundle_by_imdb(imdb_id, director_name)
+        poster, details, trailer_url = bundle["poster"], bundle["details"], bundle["trailer"]
 
         st.markdown("<div style='border-top: 2px solid #eee; margin: 2rem 0;'></div>", unsafe_allow_html=True)
         # Highlighting the movie name in red using HTML inside the markdown
         st.markdown(f"<h2>🎬 Details for: <span style='color: #FF4B4B;'>{movie_title}</span></h2>", unsafe_allow_html=True)
 
-        # Display poster and details side-by-side
-        detail_col_left, detail_col_right = st.columns([1, 2])
-        with detail_col_left:
-            poster = fetch_poster_by_imdb(imdb_id)
-            if poster:
-                st.image(poster, use_container_width=True)
-        with detail_col_right:
-            if details:
-                # Group 1: Ratings & Runtime
-                st.markdown("#### Ratings & Runtime")
-                info_cols = st.columns([1, 1, 1])
-                with info_cols[0]:
-                    rating = details.get('rating', 'N/A')
-                    st.markdown(f"**Rating:** <span style='color:green;'>{rating}</span>/10", unsafe_allow_html=True)
-                with info_cols[1]:
-                    vote_count = details.get('vote_count', 'N/A')
-                    st.markdown(f"**No. of Ratings:** <span style='color:green;'>{vote_count}</span>", unsafe_allow_html=True)
-                with info_cols[2]:
-                    runtime = f"{details.get('runtime', 'N/A')} mins" if details.get('runtime') else "N/A"
-                    st.markdown(f"**Runtime:** <span style='color:green;'>{runtime}</span>", unsafe_allow_html=True)
-
-                st.markdown("<br>", unsafe_allow_html=True)
-                # Tagline in a blue info box
-                if details.get("tagline"):
-                    st.info(details["tagline"])
-                # Overview
-                st.markdown("**Overview:**")
-                st.write(details.get("overview", "N/A"))
-
-                st.markdown("<br>", unsafe_allow_html=True)
-                # Group 2: Release & Financials
-                st.markdown("#### Release & Financials")
-                row1_cols = st.columns([1, 1, 1])
-                with row1_cols[0]:
-                    st.markdown(f"**Release Date:** {details.get('release_date', 'N/A')}")
-                with row1_cols[1]:
-                    st.markdown(f"**Budget:** {details.get('budget', 'N/A')}")
-                with row1_cols[2]:
-                    st.markdown(f"**Revenue:** {details.get('revenue', 'N/A')}")
-                    
-                st.markdown("<br>", unsafe_allow_html=True)
-                # Group 3: Production Details
-                st.markdown("#### Production Details")
-                row2_cols = st.columns([1, 1, 1])
-                with row2_cols[0]:
-                    st.markdown(f"**Genres:** {details.get('genres', 'N/A')}")
-                with row2_cols[1]:
-                    st.markdown(f"**Available in:** {details.get('available_in', 'N/A')}")
-                with row2_cols[2]:
-                    st.markdown(f"**Directed by:** {details.get('director', 'N/A')}")
-                    
-                st.markdown("<br>", unsafe_allow_html=True)
-                # Cast Section
-                if details.get("cast"):
-                    st.markdown("#### Cast")
-                    cast_cols = st.columns(len(details["cast"]))
-                    for idx, actor in enumerate(details["cast"]):
-                        with cast_cols[idx]:
-                            if actor.get("profile"):
-                                st.image(actor["profile"], use_container_width=True)
-                            st.caption(f"{actor.get('name')} as {actor.get('character')}")
-            else:
-                st.error("Could not retrieve movie details. Please try another movie.")
-
-            if trailer_url:
-                with st.expander("Watch Trailer"):
-                    st.video(trailer_url)
+        render_details(details, trailer_url, poster)
 
         # Display Recommendations
         with st.spinner("Fetching Recommendations..."):
@@ -437,91 +712,21 @@ if "mode" in st.session_state and st.session_state.mode:
     elif st.session_state.mode == "surprise":
         random_data = st.session_state.random_movie
         movie_title = random_data["title"]
-        imdb_id = random_data.get("imdb_id")
-        if not imdb_id:
-            movie_row = movies[movies["original_title"] == movie_title].iloc[0]
-            imdb_id = movie_row.imdb_id
-        director_name = "N/A"
-        if has_director_col:
-            try:
-                director_name = movies[movies["original_title"] == movie_title].iloc[0]["director"]
-            except Exception:
-                director_name = "N/A"
+        # Read the picked row by position; titles aren't unique in the dataset
+        movie_row = movies.iloc[random_data["row"]]
+        imdb_id = movie_row.imdb_id
+        director_name = movie_row["director"] if has_director_col and pd.notna(movie_row["director"]) else "N/A"
 
         update_history(imdb_id)
-        details = get_movie_details_by_imdb(imdb_id, director_name=director_name)
-        trailer_url = fetch_trailer_by_imdb(imdb_id)
+        # Poster, details and trailer all come back from one TMDB request
+        bundle = fetch_movie_bundle_by_imdb(imdb_id, director_name)
+        poster, details, trailer_url = bundle["poster"], bundle["details"], bundle["trailer"]
 
         st.markdown("<div style='border-top: 2px solid #eee; margin: 2rem 0;'></div>", unsafe_allow_html=True)
         # Highlighting the movie name in red using HTML inside the markdown
         st.markdown(f"<h2>🎉 Your Surprise Movie: <span style='color: #FF4B4B;'>{movie_title}</span></h2>", unsafe_allow_html=True)
 
-        detail_col_left, detail_col_right = st.columns([1, 2])
-        with detail_col_left:
-            poster = fetch_poster_by_imdb(imdb_id)
-            if poster:
-                st.image(poster, use_container_width=True)
-        with detail_col_right:
-            if details:
-                # Group 1: Ratings & Runtime
-                st.markdown("#### Ratings & Runtime")
-                info_cols = st.columns([1, 1, 1])
-                with info_cols[0]:
-                    rating = details.get('rating', 'N/A')
-                    st.markdown(f"**Rating:** <span style='color:green;'>{rating}</span>/10", unsafe_allow_html=True)
-                with info_cols[1]:
-                    vote_count = details.get('vote_count', 'N/A')
-                    st.markdown(f"**No. of Ratings:** <span style='color:green;'>{vote_count}</span>", unsafe_allow_html=True)
-                with info_cols[2]:
-                    runtime = f"{details.get('runtime', 'N/A')} mins" if details.get('runtime') else "N/A"
-                    st.markdown(f"**Runtime:** <span style='color:green;'>{runtime}</span>", unsafe_allow_html=True)
-
-                st.markdown("<br>", unsafe_allow_html=True)
-                # Tagline in a blue info box
-                if details.get("tagline"):
-                    st.info(details["tagline"])
-                # Overview
-                st.markdown("**Overview:**")
-                st.write(details.get("overview", "N/A"))
-
-                st.markdown("<br>", unsafe_allow_html=True)
-                # Group 2: Release & Financials
-                st.markdown("#### Release & Financials")
-                row1_cols = st.columns([1, 1, 1])
-                with row1_cols[0]:
-                    st.markdown(f"**Release Date:** {details.get('release_date', 'N/A')}")
-                with row1_cols[1]:
-                    st.markdown(f"**Budget:** {details.get('budget', 'N/A')}")
-                with row1_cols[2]:
-                    st.markdown(f"**Revenue:** {details.get('revenue', 'N/A')}")
-                    
-                st.markdown("<br>", unsafe_allow_html=True)
-                # Group 3: Production Details
-                st.markdown("#### Production Details")
-                row2_cols = st.columns([1, 1, 1])
-                with row2_cols[0]:
-                    st.markdown(f"**Genres:** {details.get('genres', 'N/A')}")
-                with row2_cols[1]:
-                    st.markdown(f"**Available in:** {details.get('available_in', 'N/A')}")
-                with row2_cols[2]:
-                    st.markdown(f"**Directed by:** {details.get('director', 'N/A')}")
-                    
-                st.markdown("<br>", unsafe_allow_html=True)
-                # Cast Section
-                if details.get("cast"):
-                    st.markdown("#### Cast")
-                    cast_cols = st.columns(len(details["cast"]))
-                    for idx, actor in enumerate(details["cast"]):
-                        with cast_cols[idx]:
-                            if actor.get("profile"):
-                                st.image(actor["profile"], use_container_width=True)
-                            st.caption(f"{actor.get('name')} as {actor.get('character')}")
-            else:
-                st.error("Could not retrieve movie details. Please try another movie.")
-
-            if trailer_url:
-                with st.expander("Watch Trailer"):
-                    st.video(trailer_url)
+        render_details(details, trailer_url, poster)
 
 # ------------------------------
 # Sidebar: Recently Viewed
@@ -529,11 +734,12 @@ if "mode" in st.session_state and st.session_state.mode:
 with st.sidebar:
     st.header("🕒 Recently Viewed")
     if st.session_state.history:
+        hist_posters = _batch_resolve_and_poster(tuple(st.session_state.history))
         for i, hist_imdb in enumerate(reversed(st.session_state.history)):
             # Find row by imdb_id
-            row = movies[movies["imdb_id"] == hist_imdb].iloc[0]
+            row = movies.iloc[_imdb_to_idx[hist_imdb]]
             hist_title = row["original_title"]
-            hist_poster = fetch_poster_by_imdb(hist_imdb)
+            hist_poster = hist_posters.get(hist_imdb)
 
             history_container = st.container()
             with history_container: